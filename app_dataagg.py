@@ -5,7 +5,7 @@ from shiny import App, Inputs, Outputs, Session, render, ui, req, reactive
 from shinywidgets import render_plotly
 import faicons as fa
 
-from utils.data_processing import load_csv, run_tests, export_data, radiacion
+from utils.data_processing import load_csv, run_tests, export_data, radiacion, build_wide_table
 from utils.plots import graficado_plotly, graficado_radiacion
 from components.panels import panel_subir_archivo, panel_pruebas_archivo, panel_cargar_datos
 from components.helper_text import info_modal
@@ -119,6 +119,8 @@ def server(input: Inputs, output: Outputs, session: Session):
                 con.register('tmp', c)
                 con.execute("INSERT INTO lecturas SELECT * FROM tmp;")
                 p.set(i + chunk, message=f"Cargando filas {i+1}-{min(i+chunk, len(df_load))}…")
+            p.set(message="Actualizando tabla en formato ancho…")
+            build_wide_table(con, replace=True)
             con.execute("COMMIT;")
             con.close()
         return ui.tags.div("Carga completada", class_="text-success")
@@ -0,0 +1,37 @@
+from types import MappingProxyType
+
+# Catálogos de la calculadora FV, de sólo lectura y compartidos por la UI y el servidor
+
+MODULES_PV = MappingProxyType({
+    "JA Solar 550W Mono": MappingProxyType({
+        "pdc0": 550,
+        "gamma_pdc": -0.004
+    }),
+    "Canadian Solar 500W Poly": MappingProxyType({
+        "pdc0": 500,
+        "gamma_pdc": -0.0042
+    }),
+    "Longi 450W Mono": MappingProxyType({
+        "pdc0": 450,
+        "gamma_pdc": -0.0039
+    }),
+    "Trina Solar 410W Bifacial": MappingProxyType({
+        "pdc0": 410,
+        "gamma_pdc": -0.0038
+    })
+})
+
+# Tipo de montaje -> parámetros SAPM de temperatura de celda
+ASSEMBLY_OPTIONS = MappingProxyType({
+    "Módulo bifacial o vidrio-vidrio en estructura abierta": "open_rack_glass_glass",
+    "Módulo monocristalino/policristalino en rack abierto": "open_rack_glass_polymer",
+    "Módulo vidrio-vidrio montado sobre techo": "roof_mount_glass_glass",
+    "Módulo estándar montado sobre techo": "roof_mount_glass_polymer",
+    "Módulo en estructura con aislamiento": "insulated_back_glass_polymer"
+})
+
+# Inversor -> eficiencia [0-1]
+INVERTERS = MappingProxyType({
+    "Inversor A (96%)": 0.96,
+    "Inversor B (98%)": 0.98
+})
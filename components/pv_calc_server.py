@@ -1,22 +1,82 @@
+import asyncio
+from collections import OrderedDict
 from shiny import App, ui, render, reactive
 from shinywidgets import output_widget, render_widget
-from utils.config import load_settings
-from utils.pv_calc import irradiance_poa, hsp_calc, hsp_visual, power_calc, modules, pvgen_demand_year, pvgen_demand_bimonth, poa_visual, power_setdate
-from components.pv_calc_ui import modules_pv, assembly_options, inverters
+import plotly.graph_objects as go
 import pandas as pd
-import duckdb
+from utils.pv_calc import hsp_visual, power_calc, modules, pvgen_demand_year, pvgen_demand_bimonth, poa_visual, power_setdate
+from components.catalogs import MODULES_PV, ASSEMBLY_OPTIONS, INVERTERS
+from utils.pv_data import get_pv_df, get_solpos, get_irradiance, get_hsp, TIMEZONE
 
-_, latitude, longitude, _ , _ = load_settings()
-lat, lon = latitude, longitude
-con = duckdb.connect('esolmet.db')
-df_large = con.execute("SELECT * FROM lecturas").fetchdf()
+df = get_pv_df()
+get_solpos() # La posición solar se calcula al arrancar y la comparten todas las sesiones
 
+# Entradas que determinan la irradiancia/HSP y la potencia; las figuras que sólo dependen
+# de ellas no se reconstruyen cuando cambia la meta de energía
+IRRADIANCE_INPUTS = ("surface_tilt", "surface_azimuth")
+POWER_INPUTS = IRRADIANCE_INPUTS + ("pdc0", "gamma_pdc", "assembly", "inv_eff")
 
-df = df_large.pivot(index='fecha', columns='variable', values='valor')
-df.index = pd.to_datetime(df.index)
-df = df.sort_index()
-df = df.loc["2024"]
-df.index = df.index.tz_localize('America/Mexico_City') # type: ignore # Asignación de zona horaria
+# Figuras ya construidas por combinación de entradas (LRU)
+_FIGURES = OrderedDict()
+FIGURES_MAXSIZE = 64
+
+
+def cached_figure(key, build):
+    '''
+    Devuelve la figura asociada a key, construyéndola con build() si no está en caché
+
+    Parámetros:
+    - key: tupla con el nombre de la figura y las entradas que la determinan
+    - build: función sin argumentos que construye la figura
+
+    Return: Una copia de la figura, para que render_widget no modifique la guardada
+    '''
+    fig = _FIGURES.get(key)
+    if fig is None:
+        fig = build()
+        _FIGURES[key] = fig
+        if len(_FIGURES) > FIGURES_MAXSIZE:
+            _FIGURES.popitem(last=False)
+    else:
+        _FIGURES.move_to_end(key)
+    return go.Figure(fig)
+
+
+def csv_chunks(df, chunk=5000):
+    '''
+    Genera el CSV de un DataFrame por bloques de filas
+
+    Parámetros:
+    - df: DataFrame a exportar, con su índice
+    - chunk: número de filas por bloque
+
+    Return: generador de cadenas CSV; sólo el primer bloque incluye el encabezado
+    '''
+    for i in range(0, len(df), chunk):
+        yield df.iloc[i : i + chunk].to_csv(header=(i == 0))
+
+
+def run_calcs(inputs):
+    '''
+    Ejecuta los cálculos FV para un conjunto de entradas ya resueltas
+
+    Parámetros:
+    - inputs: dict con surface_tilt, surface_azimuth, pdc0, gamma_pdc, assembly, inv_eff, goal_year y goal_bimonth
+
+    Return: dict con la irradiancia POA, potencia AC, HSP, energía del sistema y las entradas usadas
+    '''
+    irradiance = get_irradiance(inputs["surface_tilt"],inputs["surface_azimuth"])
+    df_hsp = get_hsp(inputs["surface_tilt"],inputs["surface_azimuth"])
+    ac_power, df_poa_power = power_calc(df,irradiance,inputs["assembly"],inputs["pdc0"],inputs["gamma_pdc"],inputs["inv_eff"])
+    num_pv, pvno_energy_year, percen, energy_year, energy_monthly = modules(ac_power,inputs["goal_year"])
+
+    return {"irradiance": irradiance,"ac_power": ac_power,"df_poa_power": df_poa_power,
+            "num_pv": num_pv,"pvno_energy_year": pvno_energy_year,"percen": percen,
+            "energy_year": energy_year,"energy_monthly": energy_monthly,"df_hsp": df_hsp,
+            "inputs": inputs,
+            "key": tuple(inputs.items()),
+            "irradiance_key": tuple(inputs[name] for name in IRRADIANCE_INPUTS),
+            "power_key": tuple(inputs[name] for name in POWER_INPUTS) }
 
 
 def pv_calc_server(input, output, session):
@@ -35,96 +95,116 @@ def pv_calc_server(input, output, session):
     @reactive.calc
     def energy_goal():
         if input.consume_type() == "Anual":
-            goal = input.goal_year
+            goal = input.goal_year()
         else:
             goal = sum(bimonth_input())
         return goal
 
     @reactive.calc
-    def calcs():
-        # Inputs
-        surface_tilt=input.tilt()
-        surface_azimuth=input.azimuth()
-        selected_mod = input.model_pv()
-        pdc0 = modules_pv[selected_mod]["pdc0"]
-        gamma_pdc = modules_pv[selected_mod]["gamma_pdc"]
-        selected_asse = input.assembly()
-        assembly = assembly_options[selected_asse]
-        selected_inv = input.inverter_model()
-        inv_eff = inverters[selected_inv]
-        goal_year = energy_goal()
-        # Funciones de cálculo
-        irradiance = irradiance_poa(df,lat,lon,surface_tilt,surface_azimuth)
-        ac_power, df_poa_power = power_calc(df,irradiance,assembly,pdc0,gamma_pdc,inv_eff)
-        num_pv, pvno_energy_year, percen, energy_year, energy_monthly = modules(ac_power,goal_year)
-
-        return {"irradiance": irradiance,"ac_power": ac_power,"df_poa_power": df_poa_power,
-                "num_pv": num_pv,"pvno_energy_year": pvno_energy_year,"percen": percen,
-                "energy_year": energy_year,"energy_monthly": energy_monthly }
+    def set_date_local():
+        return pd.Timestamp(input.set_date()).tz_localize(TIMEZONE)
+
+    # Cada selector se resuelve por separado para invalidar sólo lo que cambia
+    @reactive.calc
+    def pv_params():
+        return MODULES_PV[input.model_pv()]
+
+    @reactive.calc
+    def assembly_param():
+        return ASSEMBLY_OPTIONS[input.assembly()]
+
+    @reactive.calc
+    def inv_eff_param():
+        return INVERTERS[input.inverter_model()]
+
+    @reactive.calc
+    def current_inputs():
+        params = pv_params()
+        return {"surface_tilt": input.tilt(),
+                "surface_azimuth": input.azimuth(),
+                "pdc0": params["pdc0"],
+                "gamma_pdc": params["gamma_pdc"],
+                "assembly": assembly_param(),
+                "inv_eff": inv_eff_param(),
+                "goal_year": energy_goal(),
+                "goal_bimonth": tuple(bimonth_input())}
+
+    # Los cálculos corren en un hilo para no bloquear la sesión; los hilos comparten
+    # los datos y las cachés de pv_data sin copiarlos ni serializar los resultados
+    @ui.bind_task_button(button_id="run_sim")
+    @reactive.extended_task
+    async def calcs_task(inputs):
+        return await asyncio.to_thread(run_calcs, inputs)
+
+    @reactive.effect
+    @reactive.event(input.run_sim)
+    def _():
+        calcs_task.invoke(current_inputs())
 
     @output
     @render_widget # type: ignore
     def graph_energy_month():
-        goal_year = input.goal_year()
-        num_pv = calcs()["num_pv"]
-        energy_monthly = calcs()["energy_monthly"]        
-        return pvgen_demand_year(goal_year,num_pv,energy_monthly)
+        # La meta es la del último cálculo, la misma con la que se obtuvo num_pv
+        c = calcs_task.result()
+        goal_year = c["inputs"]["goal_year"]
+        num_pv = c["num_pv"]
+        energy_monthly = c["energy_monthly"]
+        return cached_figure(("energy_month", c["key"]),
+                             lambda: pvgen_demand_year(goal_year,num_pv,energy_monthly))
     
     @output
     @render_widget # type: ignore
     def graph_energy_bimonth():
-        goal_bimonth = bimonth_input()
-        num_pv = calcs()["num_pv"]
-        energy_monthly = calcs()["energy_monthly"]        
-        return pvgen_demand_bimonth(goal_bimonth,num_pv,energy_monthly)
+        c = calcs_task.result()
+        goal_bimonth = c["inputs"]["goal_bimonth"]
+        num_pv = c["num_pv"]
+        energy_monthly = c["energy_monthly"]
+        return cached_figure(("energy_bimonth", c["key"]),
+                             lambda: pvgen_demand_bimonth(goal_bimonth,num_pv,energy_monthly))
 
     @output
     @render_widget # type: ignore
     def graph_irradiances():
-        set_date = input.set_date()
-        irradiance = calcs()["irradiance"]       
-        return poa_visual(df,irradiance,set_date)
+        set_date = set_date_local()
+        c = calcs_task.result()
+        irradiance = c["irradiance"]
+        return cached_figure(("irradiances", c["irradiance_key"], set_date),
+                             lambda: poa_visual(df,irradiance,set_date))
     
     @output
     @render_widget # type: ignore
     def graph_ac_power():
-        set_date = input.set_date()
-        ac_power = calcs()["ac_power"]       
-        return power_setdate(ac_power,set_date)
+        set_date = set_date_local()
+        c = calcs_task.result()
+        ac_power = c["ac_power"]
+        return cached_figure(("ac_power", c["power_key"], set_date),
+                             lambda: power_setdate(ac_power,set_date))
 
     @output
     @render_widget
     def graph_hsp():
-        surface_tilt=input.tilt()
-        surface_azimuth=input.azimuth()
-        df_hsp = hsp_calc(df,lat,lon,surface_tilt, surface_azimuth)
-        irradiance = calcs()["irradiance"]   
-        set_date = input.set_date()    
-        return hsp_visual(df_hsp,irradiance,set_date)
+        c = calcs_task.result()
+        df_hsp = c["df_hsp"]
+        irradiance = c["irradiance"]
+        set_date = set_date_local()
+        return cached_figure(("hsp", c["irradiance_key"], set_date),
+                             lambda: hsp_visual(df_hsp,irradiance,set_date))
     
     @output
-    @render.table
+    @render.table(index=True) # Las inclinaciones de cada fila viven en el índice Tilt
     def table_hsp():
-        surface_tilt=input.tilt()
-        surface_azimuth=input.azimuth()
-        return hsp_calc(df,lat,lon,surface_tilt, surface_azimuth)
+        return calcs_task.result()["df_hsp"]
     
-    # # Botón de descarga para datos POA
-    # @output
-    # @render.download
-    # def download_data_poa():
-    #     def writer():
-    #         df_poa_power = calcs()["df_poa_power"] 
-    #         yield df_poa_power.to_csv()
-    #     return writer
-
-    # # Botón de descarga para tabla HSP
-    # @output
-    # @render.download
-    # def download_table_hsp():
-    #     def writer():
-    #         table = table_hsp()
-    #         yield table.to_csv()
-    #     return writer
+    # Botón de descarga para datos POA
+    @render.download(filename="poa_potencia.csv")
+    def download_data_poa():
+        df_poa_power = calcs_task.result()["df_poa_power"]
+        yield from csv_chunks(df_poa_power)
+
+    # Botón de descarga para tabla HSP
+    @render.download(filename="tabla_hsp.csv")
+    def download_table_hsp():
+        df_hsp = calcs_task.result()["df_hsp"]
+        yield from csv_chunks(df_hsp)
     
 # app = App(ui=pv_calc_ui, server=pv_calc_server)
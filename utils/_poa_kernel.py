@@ -0,0 +1,31 @@
+# Sólo se importa si numba está instalado: pv_calc lo carga la primera vez que necesita el núcleo
+import numpy as np
+from numba import njit, prange
+
+
+# Núcleo compilado de la irradiancia POA global (modelo isotrópico), usado por pv_calc._poa_global
+# Sin fastmath: las lecturas pueden traer NaN y deben propagarse como en NumPy
+@njit(parallel=True, cache=True)
+def poa_global_kernel(ghi,dni,dhi,solar_zenith,solar_azimuth,surface_tilts,surface_azimuths,albedo):
+    n, N = surface_tilts.shape[0], ghi.shape[0]
+    out = np.zeros((n, N))
+    cos_tilt = np.cos(np.radians(surface_tilts))
+    sin_tilt = np.sin(np.radians(surface_tilts))
+    for j in prange(N):
+        if np.isnan(ghi[j]) or np.isnan(dni[j]) or np.isnan(dhi[j]):
+            out[:, j] = np.nan
+            continue
+        if ghi[j] == 0 and dni[j] == 0 and dhi[j] == 0:
+            continue
+        zenith = np.radians(solar_zenith[j])
+        cos_zen, sin_zen = np.cos(zenith), np.sin(zenith)
+        for i in range(n):
+            cos_aoi = cos_zen * cos_tilt[i] + sin_zen * sin_tilt[i] * np.cos(
+                np.radians(solar_azimuth[j] - surface_azimuths[i]))
+            cos_aoi = min(max(cos_aoi, -1.0), 1.0)
+            poa_direct = dni[j] * cos_aoi
+            if poa_direct < 0:
+                poa_direct = 0.0
+            out[i, j] = (poa_direct + dhi[j] * (1 + cos_tilt[i]) * 0.5
+                         + ghi[j] * albedo * (1 - cos_tilt[i]) * 0.5)
+    return out
@@ -181,6 +181,22 @@ def export_data(filepath: str) -> pd.DataFrame:
     return long_df
 
 
+def build_wide_table(con, replace: bool = False) -> None:
+    """
+    Materializa lecturas en formato ancho (una columna por variable) en la tabla lecturas_wide:
+      - replace=False sólo la crea si no existe
+      - replace=True la reconstruye, p. ej. después de cargar nuevas lecturas
+    """
+    create = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE IF NOT EXISTS"
+    con.execute(f"""
+        {create} lecturas_wide AS
+        PIVOT lecturas
+        ON variable
+        USING first(valor)
+        GROUP BY fecha
+    """)
+
+
 def radiacion(df: pd.DataFrame, rad_columns=None) -> pd.DataFrame:
     """
     Extrae datos de radiación durante la noche (altura solar ≤ 0):
@@ -13,14 +13,19 @@ def graficado_Is_matplotlib(fechas, alias_dict=None):
 
     # 2) Carga y pivoteo
     query = f"""
-    SELECT *
-      FROM lecturas
-     WHERE fecha >= TIMESTAMP '{fechas[0]}'
-       AND fecha <= TIMESTAMP '{fechas[1]}'
-     ORDER BY fecha
+    PIVOT (
+        SELECT fecha, variable, valor
+          FROM lecturas
+         WHERE fecha >= TIMESTAMP '{fechas[0]}'
+           AND fecha <= TIMESTAMP '{fechas[1]}'
+    )
+    ON variable
+    USING first(valor)
+    GROUP BY fecha
+    ORDER BY fecha
     """
-    df = con.execute(query).fetchdf()
-    df = df.pivot(index="fecha", columns="variable", values="valor")
+    df = con.execute(query).df()
+    df = df.set_index("fecha")
 
     # 3) Figure + GridSpec
     fig = plt.figure()
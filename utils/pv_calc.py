@@ -1,44 +1,199 @@
+import functools
+import importlib.util
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.io as pio
-# Librerias de Pvlib
-from pvlib.pvsystem import pvwatts_dc # Modelo PVWatts
-from pvlib.temperature import TEMPERATURE_MODEL_PARAMETERS, sapm_cell #Modelo para temperatura de celda
-from pvlib.irradiance import get_total_irradiance # Modelo para calcular plane-of-array irradiance POA
-from pvlib.location import Location # Para generar la posición solar para cada timestamp
+# plotly, pvlib y numba se importan dentro de las funciones que los usan, así que importar
+# este módulo no los carga hasta que se necesitan
 
+# Algoritmo SPA de pvlib. La posición solar se calcula una sola vez por proceso (pv_data.get_solpos),
+# y la versión de numba no guarda su compilación en disco: compilarla tarda más que el SPA de NumPy
+SPA_METHOD = "nrel_numpy"
+
+
+# Posición solar de cada timestamp
+def solar_position(df,lat,lon):
+    '''
+    Calcula la posición solar (zenith y azimuth, entre otras) para cada timestamp de df
+
+    Parámetros:
+    - df: DataFrame con índice datetime
+    - lat, lon : latitud y longitud de la estación meteorológica
+
+    Return: DataFrame de pvlib con la posición solar, con el mismo índice que df
+    '''
+    from pvlib.location import Location # Para generar la posición solar para cada timestamp
+    location = Location(latitude=lat, longitude=lon)
+    return location.get_solarposition(df.index, method=SPA_METHOD)
+
+# Coseno del ángulo de incidencia sobre el plano, acotado a [-1, 1]
+def _cos_aoi(solar_zenith,solar_azimuth,surface_tilt,surface_azimuth):
+    tilt = np.radians(surface_tilt)
+    zenith = np.radians(solar_zenith)
+    cos_aoi = (np.cos(zenith) * np.cos(tilt)
+               + np.sin(zenith) * np.sin(tilt) * np.cos(np.radians(solar_azimuth - surface_azimuth)))
+    return np.clip(cos_aoi, -1, 1)
+
+# Irradiancia POA sobre arreglos de NumPy
+def fast_irradiance_poa(ghi,dni,dhi,solar_zenith,solar_azimuth,surface_tilt,surface_azimuth,albedo=0.25):
+    '''
+    Calcula la irradiancia POA con el modelo isotrópico, el que usa get_total_irradiance por defecto,
+    directamente sobre arreglos de NumPy
+
+    Parámetros:
+    - ghi, dni, dhi: irradiancias global, directa y difusa medidas [W/m^2]
+    - solar_zenith, solar_azimuth: posición solar de cada timestamp [°]
+    - surface_tilt: ángulo de inclinación del módulo FV [°]
+    - surface_azimuth: ángulo de azimuth del módulo FV [°]
+    - albedo: reflectancia del suelo
+
+    Todos los argumentos se combinan por broadcasting.
+
+    Return: arreglos poa_global, poa_direct, poa_diffuse [W/m^2]
+    '''
+    cos_tilt = np.cos(np.radians(surface_tilt))
+    poa_direct = np.maximum(dni * _cos_aoi(solar_zenith, solar_azimuth, surface_tilt, surface_azimuth), 0)
+    poa_diffuse = dhi * (1 + cos_tilt) * 0.5 + ghi * albedo * (1 - cos_tilt) * 0.5
+    return poa_direct + poa_diffuse, poa_direct, poa_diffuse
 
 # Calculo de irradiancia sobre plano inclinado
-def irradiance_poa(df,lat,lon,surface_tilt,surface_azimuth):
+def irradiance_poa(df,lat,lon,surface_tilt,surface_azimuth,solpos=None):
     '''
-    Calcula la irradiancia sobre un plano inclinado (plane of array -POA-) con pvlib
+    Calcula la irradiancia sobre un plano inclinado (plane of array -POA-)
 
     Parámetros:
     - df: DataFrame con índice datetime que incluye variables como ghi, dni y dhi
     - lat, lon : latitud y longitud de la estación meteorológica para obtener la posición solar
     - surface_tilt: ángulo de inclinación del módulo FV [°]
     - surface_azimuth: ángulo de azimuth del módulo FV [°]
+    - solpos: posición solar de solar_position(df,lat,lon); se calcula si no se proporciona
 
-    solpos calcula la posición solar para cada timestamp
+    solpos calcula la posición solar para cada timestamp. El cálculo se hace con fast_irradiance_poa
+    sobre los arreglos de df y solpos.
 
     Return: Devuelve la irradiancia global, directa y difusa sobre un plano inclinado 
     (poa_global, poa_direct, poa_diffuse) [W/m^2]
     '''
-    location = Location(latitude=lat, longitude=lon)
-    solpos = location.get_solarposition(df.index)
-    irradiance = get_total_irradiance(
-        surface_tilt = surface_tilt,
-        surface_azimuth= surface_azimuth,
-        dni = df.dni,
-        ghi = df.ghi,
-        dhi = df.dhi,
-        solar_zenith = solpos['zenith'],
-        solar_azimuth = solpos['azimuth']
-        )
-    return irradiance
+    if solpos is None:
+        solpos = solar_position(df,lat,lon)
+    poa_global, poa_direct, poa_diffuse = fast_irradiance_poa(
+        df.ghi.to_numpy(dtype=np.float64), df.dni.to_numpy(dtype=np.float64), df.dhi.to_numpy(dtype=np.float64),
+        solpos['zenith'].to_numpy(), solpos['azimuth'].to_numpy(),
+        surface_tilt, surface_azimuth)
+    return pd.DataFrame({"poa_global": poa_global, "poa_direct": poa_direct, "poa_diffuse": poa_diffuse},
+                        index=df.index, copy=False)
+
+# Irradiancia POA global con el modelo isotrópico sobre arreglos de NumPy
+def _poa_global_isotropic(ghi,dni,dhi,solar_zenith,solar_azimuth,surface_tilt,surface_azimuth,albedo=0.25):
+    '''
+    Calcula sólo la irradiancia POA global con el modelo isotrópico, el que usa get_total_irradiance
+    por defecto, sin guardar por separado las componentes directa y difusa
+
+    Todos los argumentos se combinan por broadcasting: p. ej. surface_tilt con forma (n, 1) y
+    las series con forma (N,) evalúan n inclinaciones de una sola vez.
+
+    Return: poa_global [W/m^2]
+    '''
+    cos_tilt = np.cos(np.radians(surface_tilt))
+    cos_aoi = _cos_aoi(solar_zenith, solar_azimuth, surface_tilt, surface_azimuth)
+    return np.maximum(dni * cos_aoi, 0) + dhi * (1 + cos_tilt) * 0.5 + ghi * albedo * (1 - cos_tilt) * 0.5
+
+@functools.lru_cache(maxsize=1)
+def _poa_global_numba():
+    '''
+    Importa el núcleo de numba la primera vez que se necesita, para que importar este módulo
+    no importe numba
+
+    Return: utils._poa_kernel.poa_global_kernel, o None si numba no está instalado
+    '''
+    if importlib.util.find_spec("numba") is None:
+        return None
+    from utils._poa_kernel import poa_global_kernel
+    return poa_global_kernel
+
+# Irradiancia POA global de varias orientaciones
+def _poa_global(ghi,dni,dhi,solar_zenith,solar_azimuth,surface_tilts,surface_azimuths,albedo=0.25):
+    '''
+    Calcula sólo la irradiancia POA global para n orientaciones (surface_tilts[i], surface_azimuths[i])
+
+    Usa el núcleo de numba si está instalado y, si no, _poa_global_isotropic. Sólo se evalúa la
+    geometría en los timestamps con alguna lectura distinta de cero: si ghi, dni y dhi valen cero
+    la irradiancia POA es cero, y si falta alguna es NaN, igual que con get_total_irradiance.
+    El cargador deja las lecturas nocturnas en cero o NaN, así que la noche nunca se evalúa.
+
+    Return: arreglo de forma (n, N) [W/m^2]
+    '''
+    surface_tilts = np.asarray(surface_tilts, dtype=np.float64)
+    surface_azimuths = np.asarray(surface_azimuths, dtype=np.float64)
+    kernel = _poa_global_numba()
+    if kernel is not None:
+        series = [np.ascontiguousarray(x, dtype=np.float64) for x in (ghi, dni, dhi, solar_zenith, solar_azimuth)]
+        return kernel(*series, surface_tilts, surface_azimuths, albedo)
+    missing = np.isnan(ghi) | np.isnan(dni) | np.isnan(dhi)
+    calc = ~missing & ((ghi != 0) | (dni != 0) | (dhi != 0))
+    poa_global = np.zeros((len(surface_tilts), len(ghi)))
+    poa_global[:, missing] = np.nan
+    poa_global[:, calc] = _poa_global_isotropic(ghi[calc], dni[calc], dhi[calc], solar_zenith[calc], solar_azimuth[calc],
+                                                surface_tilts[:, None], surface_azimuths[:, None], albedo)
+    return poa_global
+
+# Agregación temporal por grupos
+def fast_resample(data,rule,how):
+    '''
+    Agrega data por intervalos de tiempo con groupby, en lugar de resample
+
+    A diferencia de resample, no crea los intervalos sin lecturas, por lo que no recorre ni
+    rellena los huecos de la serie.
+
+    Parámetros:
+    - data: Serie o DataFrame con índice datetime
+    - rule: "h" o "D" (inicio de hora o día), o "M" para meses de calendario (índice PeriodIndex)
+    - how: agregación, p. ej. "mean" o "sum"
+
+    Return: data agregado, con un renglón por intervalo con lecturas
+    '''
+    if rule == "M":
+        keys = data.index.tz_localize(None).to_period("M")
+    else:
+        keys = data.index.floor(rule)
+    return data.groupby(keys).agg(how)
+
+# HSP promedio mensual a partir de la irradiancia global sobre el plano
+# (Serie, o DataFrame con una columna por orientación para agregarlas en una sola pasada)
+def _hsp_monthly(poa_global):
+    ghi_hour = fast_resample(poa_global,"h","mean")
+    # El promedio de las sumas diarias es la suma mensual entre los días con lecturas del mes,
+    # así que no hace falta agregar por día
+    months = ghi_hour.index.tz_localize(None).to_period("M")
+    days = pd.Series(ghi_hour.index.floor("D"), index=ghi_hour.index).groupby(months).nunique()
+    hsp_avg_m = ghi_hour.groupby(months).sum().div(days, axis=0)/1000
+    # Se completan los 12 meses del año: un mes sin lecturas queda en NaN y, como los días sin
+    # lecturas, no entra en el promedio anual
+    year_months = pd.period_range(f"{months[0].year}-01", periods=12, freq="M", name=hsp_avg_m.index.name)
+    return hsp_avg_m.reindex(year_months)
+
+# Tabla de HSP con una fila por inclinación y el promedio anual, redondeada a 2 decimales
+def _hsp_table(hsp_avg_m):
+    hsp_avg_m = pd.DataFrame(hsp_avg_m)
+    vals = np.round(hsp_avg_m.to_numpy(dtype=np.float64).T, 2)
+    df_hsp = pd.DataFrame(vals, index=hsp_avg_m.columns, columns=hsp_avg_m.index.strftime('%B')) # type: ignore
+    df_hsp.index.name = "Tilt"
+    df_hsp["Average"] = np.round(np.nanmean(vals, axis=1), 2)
+    return df_hsp
+
+# Huella barata del DataFrame: los datos no cambian mientras viva el proceso
+def _df_fingerprint(df):
+    return (df.index[0], df.index[-1], len(df))
+
+# Tablas de HSP por (datos, ubicación, inclinación, azimuth), LRU de tamaño acotado:
+# las llaves vienen de ángulos libres capturados por los usuarios
+_HSP_CACHE = OrderedDict()
+HSP_CACHE_MAXSIZE = 32
+_HSP_LOCK = threading.Lock() # hsp_calc corre en hilos de varias sesiones
 
 # Cálculo de HSP
-def hsp_calc(df,lat,lon,surface_tilt, surface_azimuth):
+def hsp_calc(df,lat,lon,surface_tilt, surface_azimuth,solpos=None):
     '''
     Calcula la hora solar pico (HSP) de varios ángulos de inclinación del módulo FV
 
@@ -48,38 +203,54 @@ def hsp_calc(df,lat,lon,surface_tilt, surface_azimuth):
     - surface_tilt: ángulo de inclinación del módulo FV [°]
     - surface_azimuth: ángulo de azimuth del módulo FV [°]
 
-    solpos calcula la posición solar para cada timestamp
+    solpos calcula la posición solar para cada timestamp. El resultado se guarda en _HSP_CACHE,
+    por lo que la tabla devuelta no debe modificarse.
 
     Return: Devuelve las HSP promedio mensuales y promedio anual de los siguientes ángulos de inclinación
     (0°,lat°,lat-15°,lat+15°,90°)
     '''
-    location = Location(latitude=lat, longitude=lon)
-    solpos = location.get_solarposition(df.index)
+    key = (_df_fingerprint(df),lat,lon,round(surface_tilt,3),round(surface_azimuth,3))
+    with _HSP_LOCK:
+        if key in _HSP_CACHE:
+            _HSP_CACHE.move_to_end(key)
+            return _HSP_CACHE[key]
+
+    if solpos is None:
+        solpos = solar_position(df,lat,lon)
     tilts= [0,surface_tilt,surface_tilt-15,surface_tilt+15,90]
-    hsp_dict = {}
-    for tilt in tilts:
-        irradiance = get_total_irradiance(
-            surface_tilt = tilt,
-            surface_azimuth= surface_azimuth,
-            dni = df.dni,
-            ghi = df.ghi,
-            dhi = df.dhi,
-            solar_zenith = solpos['zenith'],
-            solar_azimuth = solpos['azimuth'])
-
-        ghi_hour = irradiance.poa_global.resample("h").mean() # type: ignore
-        hsp_d = ghi_hour.resample("D").sum()/1000  
-        hsp_avg_m = hsp_d.resample("ME").mean()
-
-        hsp_dict[f"{tilt}°"] = round(hsp_avg_m,2)
-
-    df_hsp= (pd.DataFrame(hsp_dict)).T
-    df_hsp.columns = df_hsp.columns.strftime('%B') # type: ignore
-    df_hsp.index.name = "Tilt"
-    df_hsp["Average"]=df_hsp.mean(axis=1).round(2)
-    
+    # Las cinco inclinaciones en una sola evaluación: forma (5, N)
+    poa_global = _poa_global(
+        df.ghi.to_numpy(), df.dni.to_numpy(), df.dhi.to_numpy(),
+        solpos['zenith'].to_numpy(), solpos['azimuth'].to_numpy(),
+        tilts, np.full(len(tilts), surface_azimuth))
+    poa_dict = {f"{tilt}°": poa for tilt, poa in zip(tilts, poa_global)}
+
+    # Una sola agregación mensual para todas las inclinaciones
+    hsp_avg_m = _hsp_monthly(pd.DataFrame(poa_dict, index=df.index))
+    df_hsp = _hsp_table(hsp_avg_m)
+    with _HSP_LOCK:
+        _HSP_CACHE[key] = df_hsp
+        if len(_HSP_CACHE) > HSP_CACHE_MAXSIZE:
+            _HSP_CACHE.popitem(last=False)
     return df_hsp
 
+# Selección de un día completo
+def _day(data,set_date):
+    '''
+    Devuelve las filas de data que caen en el día de set_date
+
+    Parámetros:
+    - data: Serie o DataFrame con índice datetime ordenado
+    - set_date: fecha específica; si no tiene zona horaria se usa la del índice
+
+    Return: data recortado a [set_date, set_date + 1 día)
+    '''
+    start = pd.Timestamp(set_date)
+    if start.tzinfo is None:
+        start = start.tz_localize(data.index.tz)
+    i, j = data.index.searchsorted([start, start + pd.Timedelta(days=1)])
+    return data.iloc[i:j]
+
 # Visualización la definición de HSP 
 def hsp_visual(df_hsp,irradiance,set_date):
     '''
@@ -89,34 +260,60 @@ def hsp_visual(df_hsp,irradiance,set_date):
     Parámetros:
     - df_hsp: DataFrame de las HSP promedio mensuales y anual de diferentes inclinaciones 
     - irradiance : irradiancia global sobre un plano inclinado [W/m^2]
-    - set_date: fecha específica a consultar
+    - set_date: fecha específica a consultar (fecha o Timestamp de la medianoche local)
 
     Return: Gráfico de la definición de HSP sobre una curva G de un día específico
     '''
     hsp_year= df_hsp.Average.iloc[1]
-    ghi_poa = irradiance.poa_global.resample("h").mean().loc[set_date] # type: ignore
-    center_time = ghi_poa.idxmax() #Tomé el max de irradiancia como valor central 
+    ghi_poa = fast_resample(_day(irradiance.poa_global,set_date),"h","mean") # type: ignore
+    center_time = ghi_poa.index[np.nanargmax(ghi_poa.to_numpy())] #Tomé el max de irradiancia como valor central 
     start_time = center_time - pd.Timedelta(hours=hsp_year / 2)
     end_time = center_time + pd.Timedelta(hours=hsp_year / 2)
 
-    fig = go.Figure()
+    import plotly.graph_objects as go
+    # La figura se arma como dict y se valida una sola vez al construirla
+    fig = go.Figure(dict(
+        data=[dict(type='scatter', x=ghi_poa.index, y=ghi_poa, mode='lines', name='POA Global', line=dict(color='black'))],
+        layout=dict(
+            shapes=[
+                dict(type="line", x0=start_time, x1=start_time, y0=0, y1=1000,line=dict(color="red", dash="dash"), name="Inicio HSP"), #Vertical
+                dict(type="line", x0=end_time, x1=end_time, y0=0, y1=1000,line=dict(color="red", dash="dash"), name="Fin HSP"), #Vertical
+                dict(type="line", x0=start_time, x1=end_time, y0=1000, y1=1000,line=dict(color="red", dash="dot"), name="1000 W/m²"), # Horizontal
+                dict(type="rect",x0=start_time, x1=end_time,y0=0, y1=1000,fillcolor="rgba(255,0,0,0.1)",line=dict(width=0),layer='below'), # Sombreado
+            ],
+            title=f'Visualización de HSP promedio anual de la curva de irradiancia de la fecha ({set_date:%Y-%m-%d})',
+            xaxis_title='Hora del día',
+            yaxis_title='Irradiancia (W/m^2)',
+            legend=dict(x=1.02, y=1, xanchor='left'),
+            margin=dict(r=100),
+            template='plotly_white'
+        )
+    ))
+    return fig
 
-    fig.add_trace(go.Scatter(x=ghi_poa.index, y=ghi_poa, mode='lines', name='POA Global', line=dict(color='black')))
+# Parámetros SAPM de temperatura por tipo de montaje, cargados de pvlib en el primer uso
+_SAPM_PARAMS = {}
 
-    fig.add_shape(type="line", x0=start_time, x1=start_time, y0=0, y1=1000,line=dict(color="red", dash="dash"), name="Inicio HSP") # type: ignore #Vertical
-    fig.add_shape(type="line", x0=end_time, x1=end_time, y0=0, y1=1000,line=dict(color="red", dash="dash"), name="Fin HSP") # type: ignore #Vertical
-    fig.add_shape(type="line", x0=start_time, x1=end_time, y0=1000, y1=1000,line=dict(color="red", dash="dot"), name="1000 W/m²") # type: ignore # Horizontal
-    fig.add_shape(type="rect",x0=start_time, x1=end_time,y0=0, y1=1000,fillcolor="rgba(255,0,0,0.1)",line=dict(width=0),layer='below') # type: ignore # Sombreado
+def _sapm_params():
+    if not _SAPM_PARAMS:
+        from pvlib.temperature import TEMPERATURE_MODEL_PARAMETERS #Parámetros del modelo SAPM para temperatura de celda
+        _SAPM_PARAMS.update(TEMPERATURE_MODEL_PARAMETERS['sapm'])
+    return _SAPM_PARAMS
 
-    fig.update_layout(
-        title=f'Visualización de HSP promedio anual de la curva de irradiancia de la fecha ({set_date})',
-        xaxis_title='Hora del día',
-        yaxis_title='Irradiancia (W/m^2)',
-        legend=dict(x=1.02, y=1, xanchor='left'),
-        margin=dict(r=100),
-        template='plotly_white'
-    )
-    return fig
+# Núcleo numérico de temperatura de celda (SAPM) y potencia (PVWatts)
+def _power_kernel(poa_global,temp_air,wind_speed,a,b,deltaT,pac0,gamma_pdc):
+    '''
+    Calcula la potencia AC sobre arreglos de NumPy, sin índices de pandas
+
+    Reproduce sapm_cell y pvwatts_dc de pvlib con irradiancia de referencia de 1000 W/m^2
+    y temperatura de referencia de 25 °C. PVWatts es lineal en la potencia nominal, así que
+    la eficiencia del inversor ya viene incluida en pac0 = pdc0 * inv_eff.
+
+    Return: arreglo de potencia AC [W]
+    '''
+    temp_module = poa_global * np.exp(a + b * wind_speed) + temp_air
+    temp_cell = temp_module + poa_global / 1000 * deltaT
+    return poa_global / 1000 * pac0 * (1 + gamma_pdc * (temp_cell - 25))
 
 # Cálculos para potencia AC
 def power_calc(df,irradiance,assembly,pdc0,gamma_pdc,inv_eff):
@@ -138,18 +335,22 @@ def power_calc(df,irradiance,assembly,pdc0,gamma_pdc,inv_eff):
     Return: La potencia AC en un DataFrame y un Dataframe de irradiancia POA junto con la potencia AC
     '''
     # Calcular temperatura del módulo
-    temp_params = TEMPERATURE_MODEL_PARAMETERS['sapm'][assembly]
-    poa_global = irradiance['poa_global'] # Irradiancia sobre el plano con ángulos incluidos
-    module_temp = sapm_cell(
-        poa_global=poa_global,
-        temp_air=df['tdb'],
-        wind_speed=df['ws'],
-        **temp_params
-    )# modelo SAPM para obtener temperatura de la celda únicamente
-    dc_power = pvwatts_dc(poa_global, module_temp, pdc0=pdc0, gamma_pdc=gamma_pdc) # Potencia DC
-    ac_power = dc_power * inv_eff # Potencia AC brinda la potencia en W en intervalos de 10min de un único módulo 
-    df_poa_power = irradiance[["poa_global", "poa_direct", "poa_diffuse"]].copy()
-    df_poa_power["ac_power"] = ac_power
+    temp_params = _sapm_params()[assembly]
+    # Columnas como arreglos float64 contiguos: las lecturas vienen en float32 y se convierten una sola vez
+    poa_global = np.ascontiguousarray(irradiance['poa_global'].to_numpy(), dtype=np.float64) # Irradiancia sobre el plano con ángulos incluidos
+    temp_air = np.ascontiguousarray(df['tdb'].to_numpy(), dtype=np.float64)
+    wind_speed = np.ascontiguousarray(df['ws'].to_numpy(), dtype=np.float64)
+    ac_power = pd.Series(
+        _power_kernel(poa_global, temp_air, wind_speed,
+                      temp_params['a'], temp_params['b'], temp_params['deltaT'],
+                      pdc0 * inv_eff, gamma_pdc),
+        index=irradiance.index, copy=False) # Potencia AC brinda la potencia en W en intervalos de 10min de un único módulo 
+    # Sin copias: comparte los arreglos de irradiance, que no se modifican
+    df_poa_power = pd.DataFrame({"poa_global": irradiance["poa_global"].to_numpy(),
+                                 "poa_direct": irradiance["poa_direct"].to_numpy(),
+                                 "poa_diffuse": irradiance["poa_diffuse"].to_numpy(),
+                                 "ac_power": ac_power.to_numpy()},
+                                index=irradiance.index, copy=False)
 
     return ac_power, df_poa_power
 
@@ -166,9 +367,12 @@ def modules(ac_power,goal_year):
     energía anual del número de módulos FV [kWh], porcentaje de energía cubierta por los módulos FV
     energía anual [kWh], energía mensual de un sólo módulo [kWh].
     ''' 
-    ac_power_hour = ac_power.resample("h").mean()/1000 # Energía por hora en kWh
-    energy_monthly = ac_power_hour.resample("ME").sum()
-    energy_year = ac_power_hour.sum()
+    ac_power_hour = fast_resample(ac_power,"h","mean")/1000 # Energía por hora en kWh
+    energy_monthly = fast_resample(ac_power_hour,"M","sum")
+    # fast_resample omite los meses sin lecturas: se completan los 12 meses del año con cero
+    months = pd.period_range(f"{energy_monthly.index[0].year}-01", periods=12, freq="M", name=energy_monthly.index.name)
+    energy_monthly = energy_monthly.reindex(months, fill_value=0)
+    energy_year = energy_monthly.sum() # Los 12 meses ya agregados bastan para el total anual
     num_pv = (goal_year / energy_year).round()
     pvno_energy_year = (num_pv*energy_year).round(2)
     percen = ((num_pv*energy_year)/goal_year)*100
@@ -188,34 +392,36 @@ def pvgen_demand_year(goal_year,num_pv,energy_monthly):
     Return: Gráfico generación FV vs Demanda mensual promedio de un año
     '''
     demand = round(goal_year/12,2)
-    energy_monthly_array = pd.DataFrame({"Generación FV": (energy_monthly * num_pv).round(2),
-        "Demanda":  demand})
-    months = energy_monthly_array.index.to_period('M').strftime('%b') # type: ignore
-
-    fig = go.Figure([
-        go.Bar(name='Generación FV', x=months, y=energy_monthly_array["Generación FV"],
-            marker_color='rgb(26, 118, 255)'),
-        go.Bar(name='Demanda', x=months, y=energy_monthly_array["Demanda"],
-            marker_color='rgb(55, 83, 109)')
-    ])
-
-    fig.update_layout(
-        title='Energía mensual: Generación FV vs Demanda',
-        xaxis_title='Mes',
-        yaxis_title='Energía (kWh)',
-        barmode='group',
-        bargap=0.15,
-        bargroupgap=0.1,
-        legend=dict(
-            x=1.1,  # Dentro del área de trazado
-            y=1,
-            xanchor='right',
-            yanchor='top',
-            bgcolor='rgba(0,0,0,0)',  # Fondo transparente
-            bordercolor='rgba(0,0,0,0)'  # Sin borde
-        ),
-        margin=dict(r=30)
-    )
+    months = energy_monthly.index.strftime('%b') # type: ignore
+    generation = np.round(energy_monthly.to_numpy() * num_pv, 2)
+    demand = np.full(len(months), demand)
+
+    import plotly.graph_objects as go
+    fig = go.Figure(dict(
+        data=[
+            dict(type='bar', name='Generación FV', x=months, y=generation,
+                marker_color='rgb(26, 118, 255)'),
+            dict(type='bar', name='Demanda', x=months, y=demand,
+                marker_color='rgb(55, 83, 109)')
+        ],
+        layout=dict(
+            title='Energía mensual: Generación FV vs Demanda',
+            xaxis_title='Mes',
+            yaxis_title='Energía (kWh)',
+            barmode='group',
+            bargap=0.15,
+            bargroupgap=0.1,
+            legend=dict(
+                x=1.1,  # Dentro del área de trazado
+                y=1,
+                xanchor='right',
+                yanchor='top',
+                bgcolor='rgba(0,0,0,0)',  # Fondo transparente
+                bordercolor='rgba(0,0,0,0)'  # Sin borde
+            ),
+            margin=dict(r=30)
+        )
+    ))
     return fig
 
 # CONSUMO BIMESTRAL
@@ -230,43 +436,38 @@ def pvgen_demand_bimonth(goal_bimonth,num_pv,energy_monthly):
 
     Return: Gráfico generación FV vs Demanda bimestral de un año
     '''
-    demand = goal_bimonth
-    bimestres = ["Ene-Feb", "Ene-Feb", "Mar-Abr", "Mar-Abr", "May-Jun", "May-Jun",
-                "Jul-Ago", "Jul-Ago", "Sep-Oct", "Sep-Oct", "Nov-Dic", "Nov-Dic"]
-    energy_bimon_df = energy_monthly.copy()
-    energy_bimon_df.index = bimestres
-    gen_bimon = energy_bimon_df.groupby(level=0).sum()
+    demand = np.asarray(goal_bimonth)
     orden_bimestres = ["Ene-Feb", "Mar-Abr", "May-Jun", "Jul-Ago", "Sep-Oct", "Nov-Dic"]
-    gen_bimon = gen_bimon.reindex(orden_bimestres)
-    # demand_series = pd.Series(goal_bimonth, index=orden_bimestres)
-    energy_monthly_array = pd.DataFrame({"Generación FV": (gen_bimon * num_pv).round(2),
-        "Demanda": demand
-    })
-
-    fig = go.Figure([
-        go.Bar(name='Generación FV', x=energy_monthly_array.index, y=energy_monthly_array["Generación FV"],
-            marker_color='rgb(26, 118, 255)'),
-        go.Bar(name='Demanda', x=energy_monthly_array.index, y=energy_monthly_array["Demanda"],
-            marker_color='rgb(55, 83, 109)')
-    ])
-
-    fig.update_layout(
-        title='Energía bimestral: Generación FV vs Demanda',
-        xaxis_title='Mes',
-        yaxis_title='Energía (kWh)',
-        barmode='group',
-        bargap=0.15,
-        bargroupgap=0.1,
-        legend=dict(
-            x=1.1,  # Dentro del área de trazado
-            y=1,
-            xanchor='right',
-            yanchor='top',
-            bgcolor='rgba(0,0,0,0)',  # Fondo transparente
-            bordercolor='rgba(0,0,0,0)'  # Sin borde
-        ),
-        margin=dict(r=30)
-    )
+    # Los 12 meses en orden: cada par de meses consecutivos forma un bimestre
+    gen_bimon = energy_monthly.to_numpy().reshape(6, 2).sum(axis=1)
+    generation = np.round(gen_bimon * num_pv, 2)
+
+    import plotly.graph_objects as go
+    fig = go.Figure(dict(
+        data=[
+            dict(type='bar', name='Generación FV', x=orden_bimestres, y=generation,
+                marker_color='rgb(26, 118, 255)'),
+            dict(type='bar', name='Demanda', x=orden_bimestres, y=demand,
+                marker_color='rgb(55, 83, 109)')
+        ],
+        layout=dict(
+            title='Energía bimestral: Generación FV vs Demanda',
+            xaxis_title='Mes',
+            yaxis_title='Energía (kWh)',
+            barmode='group',
+            bargap=0.15,
+            bargroupgap=0.1,
+            legend=dict(
+                x=1.1,  # Dentro del área de trazado
+                y=1,
+                xanchor='right',
+                yanchor='top',
+                bgcolor='rgba(0,0,0,0)',  # Fondo transparente
+                bordercolor='rgba(0,0,0,0)'  # Sin borde
+            ),
+            margin=dict(r=30)
+        )
+    ))
     return fig
 
 # 8. Visualización de ghi, dni, dhi contra ghi2, dni2, dhi2 del modelo POA
@@ -277,37 +478,42 @@ def poa_visual(df,irradiance,set_date):
     Parámetros:
     - df: DataFrame con índice datetime que incluye variables como ghi, dni, dhi, tdb, ws
     - irradiance : irradiancia sobre un plano inclinado (global, directa y difusa) [W/m^2]
-    - set_date: fecha específica a consultar
+    - set_date: fecha específica a consultar (fecha o Timestamp de la medianoche local)
 
     Return: Gráfico irradiancias de mediciones meteorológicas e irradiancias sobre un plano inclinado (POA)
     '''
     # Mediciones
-    ghi = df.ghi.resample("h").mean().loc[set_date].round(2)
-    dni = df.dni.resample("h").mean().loc[set_date]
-    dhi = df.dhi.resample("h").mean().loc[set_date]
+    # Se recorta el día antes de promediar por hora: una sola agregación por DataFrame
+    measured = fast_resample(_day(df,set_date)[["ghi","dni","dhi"]],"h","mean")
+    ghi = measured.ghi.round(2)
+    dni = measured.dni
+    dhi = measured.dhi
     # Del irradiance model POA sobre plano inclinado
-    ghi2 = irradiance.poa_global.resample("h").mean().loc[set_date] # type: ignore
-    dni2 = irradiance.poa_direct.resample("h").mean().loc[set_date] # type: ignore
-    dhi2 = irradiance.poa_diffuse.resample("h").mean().loc[set_date] # type: ignore
-
-    fig = go.Figure()
-
-    fig.add_trace(go.Scatter(x=ghi.index, y=ghi, mode='lines', name='GHI (medido)', line=dict(color='red')))
-    fig.add_trace(go.Scatter(x=dni.index, y=dni, mode='lines', name='DNI (medido)', line=dict(color='blue')))
-    fig.add_trace(go.Scatter(x=dhi.index, y=dhi, mode='lines', name='DHI (medido)', line=dict(color='gold')))
-
-    fig.add_trace(go.Scatter(x=ghi2.index, y=ghi2, mode='lines', name='POA Global', line=dict(color='purple')))
-    fig.add_trace(go.Scatter(x=dni2.index, y=dni2, mode='lines', name='POA Directa', line=dict(color='cyan')))
-    fig.add_trace(go.Scatter(x=dhi2.index, y=dhi2, mode='lines', name='POA Difusa', line=dict(color='green')))
-
-    fig.update_layout(
-        title=f'Comparación de Irradiancias: Medidas vs POA ({set_date})',
-        xaxis_title='Hora del día',
-        yaxis_title='Irradiancia (W/m2)',
-        legend=dict(x=1.02, y=1, xanchor='left'),
-        margin=dict(r=100),
-        template='plotly_white'
-    )
+    poa = fast_resample(_day(irradiance,set_date)[["poa_global","poa_direct","poa_diffuse"]],"h","mean") # type: ignore
+    ghi2 = poa.poa_global
+    dni2 = poa.poa_direct
+    dhi2 = poa.poa_diffuse
+
+    import plotly.graph_objects as go
+    fig = go.Figure(dict(
+        data=[
+            dict(type='scatter', x=ghi.index, y=ghi, mode='lines', name='GHI (medido)', line=dict(color='red')),
+            dict(type='scatter', x=dni.index, y=dni, mode='lines', name='DNI (medido)', line=dict(color='blue')),
+            dict(type='scatter', x=dhi.index, y=dhi, mode='lines', name='DHI (medido)', line=dict(color='gold')),
+
+            dict(type='scatter', x=ghi2.index, y=ghi2, mode='lines', name='POA Global', line=dict(color='purple')),
+            dict(type='scatter', x=dni2.index, y=dni2, mode='lines', name='POA Directa', line=dict(color='cyan')),
+            dict(type='scatter', x=dhi2.index, y=dhi2, mode='lines', name='POA Difusa', line=dict(color='green')),
+        ],
+        layout=dict(
+            title=f'Comparación de Irradiancias: Medidas vs POA ({set_date:%Y-%m-%d})',
+            xaxis_title='Hora del día',
+            yaxis_title='Irradiancia (W/m2)',
+            legend=dict(x=1.02, y=1, xanchor='left'),
+            margin=dict(r=100),
+            template='plotly_white'
+        )
+    ))
 
     return fig
 
@@ -318,30 +524,30 @@ def power_setdate(ac_power,set_date):
 
     Parámetros:
     - ac_power: DataFrame con índice datetime de la potencia AC [W]
-    - set_date: fecha específica a consultar
+    - set_date: fecha específica a consultar (fecha o Timestamp de la medianoche local)
 
     Return: Gráfico de potencia AC de un día específico
     '''
-    ac_power_day = ac_power.resample("h").mean()
-    ac_power_day = ac_power_day.loc[set_date]
-
-    fig = go.Figure()
-
-    fig.add_trace(go.Scatter(
-        x=ac_power_day.index,
-        y=ac_power_day.values,
-        mode='lines',
-        name='Potencia AC',
-        line=dict(color='blue')
+    ac_power_day = fast_resample(_day(ac_power,set_date),"h","mean")
+
+    import plotly.graph_objects as go
+    fig = go.Figure(dict(
+        data=[dict(
+            type='scatter',
+            x=ac_power_day.index,
+            y=ac_power_day.values,
+            mode='lines',
+            name='Potencia AC',
+            line=dict(color='blue')
+        )],
+        layout=dict(
+            title='Potencia AC diaria',
+            xaxis_title='Hora del día',
+            yaxis_title='Potencia AC [W]',
+            xaxis=dict(showgrid=True),
+            yaxis=dict(showgrid=True),
+            template='plotly_white'
+        )
     ))
 
-    fig.update_layout(
-        title='Potencia AC diaria',
-        xaxis_title='Hora del día',
-        yaxis_title='Potencia AC [W]',
-        xaxis=dict(showgrid=True),
-        yaxis=dict(showgrid=True),
-        template='plotly_white'
-    )
-
     return fig
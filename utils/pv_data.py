@@ -0,0 +1,111 @@
+import functools
+import os
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+from utils.config import load_settings
+from utils.data_processing import build_wide_table
+from utils.pv_calc import solar_position, irradiance_poa, hsp_calc
+
+_, latitude, longitude, _, _ = load_settings()
+
+DB_PATH = "esolmet.db"
+TIMEZONE = "America/Mexico_City"
+# Periodo [inicio, fin) usado para los cálculos FV
+PV_START = "2024-01-01"
+PV_END = "2025-01-01"
+CACHE_DIR = Path("cache")
+SNAPSHOT_PATH = CACHE_DIR / "pv_2024.pkl"
+
+
+def _snapshot_is_fresh(path: Path) -> bool:
+    """
+    Indica si el snapshot existe y es más reciente que la base de datos.
+
+    Si la base de datos no existe (p. ej. se eliminó desde app_dataagg) el
+    snapshot no se usa: sus datos ya no corresponden a ninguna base.
+    """
+    db = Path(DB_PATH)
+    if not (path.exists() and db.exists()):
+        return False
+    return path.stat().st_mtime >= db.stat().st_mtime
+
+
+def _write_pickle(obj, path: Path) -> None:
+    """
+    Escribe el pickle en un archivo temporal y lo renombra, para que otros
+    procesos nunca lean un archivo a medio escribir.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    pd.to_pickle(obj, tmp)
+    os.replace(tmp, path)
+
+
+@functools.lru_cache(maxsize=1)
+def get_pv_df() -> pd.DataFrame:
+    """
+    Carga las lecturas de 2024 en formato ancho para los cálculos FV.
+
+    El resultado se calcula una sola vez por proceso y se comparte entre
+    todas las sesiones de Shiny, por lo que no debe modificarse. Se guarda
+    un snapshot en disco que se reutiliza mientras esolmet.db no cambie.
+    """
+    if _snapshot_is_fresh(SNAPSHOT_PATH):
+        return pd.read_pickle(SNAPSHOT_PATH)
+
+    con = duckdb.connect(DB_PATH)
+    try:
+        # El pivoteo vive materializado en lecturas_wide; aquí sólo se filtra el periodo
+        build_wide_table(con)
+        df = con.execute(f"""
+            SELECT *
+              FROM lecturas_wide
+             WHERE fecha >= TIMESTAMP '{PV_START}'
+               AND fecha < TIMESTAMP '{PV_END}'
+             ORDER BY fecha
+        """).df()
+    finally:
+        con.close()
+
+    df = df.set_index("fecha")
+    df.index = df.index.tz_localize(TIMEZONE)  # type: ignore # Asignación de zona horaria
+    # float32 basta para las mediciones y reduce a la mitad la memoria del DataFrame
+    df = df.astype({c: "float32" for c in df.select_dtypes("float64").columns})
+
+    _write_pickle(df, SNAPSHOT_PATH)
+    return df
+
+
+@functools.lru_cache(maxsize=1)
+def get_solpos() -> pd.DataFrame:
+    """
+    Posición solar de cada timestamp de get_pv_df(), compartida por los
+    cálculos de POA y HSP.
+    """
+    return solar_position(get_pv_df(), latitude, longitude)
+
+
+@functools.lru_cache(maxsize=32)
+def get_irradiance(surface_tilt: float, surface_azimuth: float) -> pd.DataFrame:
+    """
+    Irradiancia POA memorizada por (inclinación, azimuth).
+
+    El DataFrame de lecturas y la ubicación son fijos durante el proceso,
+    así que los ángulos bastan como llave.
+    """
+    return irradiance_poa(get_pv_df(), latitude, longitude, surface_tilt, surface_azimuth,
+                          solpos=get_solpos())
+
+
+def get_hsp(surface_tilt: float, surface_azimuth: float) -> pd.DataFrame:
+    """
+    Tabla de HSP por (inclinación, azimuth).
+
+    Se calcula con hsp_calc sobre la posición solar compartida; hsp_calc
+    guarda sus propios resultados.
+    """
+    return hsp_calc(get_pv_df(), latitude, longitude, surface_tilt, surface_azimuth,
+                    solpos=get_solpos())